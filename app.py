@@ -1,69 +1,281 @@
 import streamlit as st
 import pandas as pd
-from transformers import pipeline
+import numpy as np
+import pyarrow.csv as pacsv
+import torch
+from transformers import AutoModelForSequenceClassification, AutoTokenizer
 import zipfile
+import io
+import os
+import platform
+import shutil
+import tempfile
+import time
+import threading
+from collections import OrderedDict
 from datetime import datetime
 
+try:
+    from optimum.onnxruntime import ORTModelForSequenceClassification, ORTQuantizer
+    from optimum.onnxruntime.configuration import AutoQuantizationConfig
+except ImportError:
+    ORTModelForSequenceClassification = None
+
 st.set_page_config(
     page_title="Issue Prioritization Dashboard",
     page_icon="📊",
     layout="wide"
 )
 
+MODEL_NAME = "distilbert-base-uncased-finetuned-sst-2-english"
+BATCH_SIZE = 32
+MAX_LENGTH = 128
+SCORE_CACHE_SIZE = 100_000
+ONNX_MODEL_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "onnx_model")
+ONNX_MODEL_FILE = "model_quantized.onnx"
+
+@torch.inference_mode()
+def score_batch(model, batch):
+    logits = model(**batch.to(model.device)).logits
+    return logits.float().softmax(-1).max(-1).values.cpu().numpy()
+
+def cpu_quantization_config():
+    if platform.machine().lower() in ("arm64", "aarch64"):
+        return "arm64", AutoQuantizationConfig.arm64(is_static=False, per_channel=False)
+
+    try:
+        with open("/proc/cpuinfo") as f:
+            has_vnni = "avx512_vnni" in f.read()
+    except OSError:
+        has_vnni = False
+
+    if has_vnni:
+        return "avx512_vnni", AutoQuantizationConfig.avx512_vnni(is_static=False, per_channel=False)
+    return "avx2", AutoQuantizationConfig.avx2(is_static=False, per_channel=False, reduce_range=True)
+
+def quantize_onnx_model(save_dir, quantization_config):
+    model = ORTModelForSequenceClassification.from_pretrained(MODEL_NAME, export=True)
+    ORTQuantizer.from_pretrained(model).quantize(save_dir=save_dir, quantization_config=quantization_config)
+
+def load_onnx_model():
+    config_name, quantization_config = cpu_quantization_config()
+    model_dir = os.path.join(ONNX_MODEL_DIR, f"{MODEL_NAME.replace('/', '--')}-{config_name}")
+
+    if not os.path.isdir(model_dir):
+        try:
+            os.makedirs(ONNX_MODEL_DIR, exist_ok=True)
+            tmp_dir = tempfile.mkdtemp(dir=ONNX_MODEL_DIR)
+        except OSError:
+            with tempfile.TemporaryDirectory() as tmp_dir:
+                quantize_onnx_model(tmp_dir, quantization_config)
+                return ORTModelForSequenceClassification.from_pretrained(tmp_dir, file_name=ONNX_MODEL_FILE)
+
+        try:
+            quantize_onnx_model(tmp_dir, quantization_config)
+            os.replace(tmp_dir, model_dir)
+        except OSError:
+            if not os.path.isdir(model_dir):
+                raise
+        finally:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+
+    return ORTModelForSequenceClassification.from_pretrained(model_dir, file_name=ONNX_MODEL_FILE)
+
 @st.cache_resource
 def load_model():
-    return pipeline("sentiment-analysis")
+    tokenizer = AutoTokenizer.from_pretrained(MODEL_NAME)
+
+    if torch.cuda.is_available():
+        model = AutoModelForSequenceClassification.from_pretrained(
+            MODEL_NAME,
+            torch_dtype=torch.float16,
+            attn_implementation="sdpa"
+        ).to("cuda").eval()
+        eager_forward = model.forward
+        try:
+            model.forward = torch.compile(eager_forward, dynamic=True)
+            score_batch(model, tokenizer(["warmup"] * BATCH_SIZE, return_tensors="pt"))
+        except Exception:
+            model.forward = eager_forward
+    elif ORTModelForSequenceClassification is None:
+        model = AutoModelForSequenceClassification.from_pretrained(MODEL_NAME, attn_implementation="sdpa").eval()
+        model = torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+    else:
+        model = load_onnx_model()
+
+    return tokenizer, model
 
 try:
     with st.spinner("Loading AI model..."):
-        classifier = load_model()
+        tokenizer, model = load_model()
 except Exception as e:
     st.error(f"Error loading model: {e}")
     st.stop()
 
-def score_to_priority_label(score):
-    if score >= 0.8:
-        return "High"
-    elif score >= 0.5:
-        return "Medium"
-    else:
-        return "Low"
+def scores_to_priority_labels(scores):
+    return np.select([scores >= 0.8, scores >= 0.5], ["High", "Medium"], default="Low")
+
+@st.cache_resource
+def load_score_cache():
+    return OrderedDict(), threading.Lock()
+
+def get_cached_scores(texts):
+    score_cache, lock = load_score_cache()
+    cached = {}
+    with lock:
+        for t in texts:
+            if t in score_cache:
+                score_cache.move_to_end(t)
+                cached[t] = score_cache[t]
+    return cached
+
+def cache_scores(scores):
+    score_cache, lock = load_score_cache()
+    with lock:
+        score_cache.update(scores)
+        for t in scores:
+            score_cache.move_to_end(t)
+        while len(score_cache) > SCORE_CACHE_SIZE:
+            score_cache.popitem(last=False)
+
+def score_texts(texts, progress_bar):
+    encoded = tokenizer(texts, truncation=True, max_length=MAX_LENGTH)
+    lengths = np.fromiter(map(len, encoded["input_ids"]), dtype=np.int32, count=len(texts))
+    order = np.argsort(lengths, kind="stable")
+
+    total = len(texts)
+    scores = np.empty(total, dtype=np.float32)
+    last_percent = 0
+    last_update = time.monotonic()
+
+    for start in range(0, total, BATCH_SIZE):
+        batch_idx = order[start:start + BATCH_SIZE]
+        batch = tokenizer.pad(
+            {key: [encoded[key][i] for i in batch_idx] for key in encoded.keys()},
+            return_tensors="pt"
+        )
+        scores[batch_idx] = score_batch(model, batch)
+
+        percent = min(start + BATCH_SIZE, total) * 100 // total
+        now = time.monotonic()
+        if percent > last_percent and now - last_update >= 0.1:
+            progress_bar.progress(percent)
+            last_percent = percent
+            last_update = now
+
+    return scores
 
 def prioritize_issues(df, text_column):
-    df = df.copy()
+    texts = df[text_column].astype("string[pyarrow]")
+    codes, unique_texts = pd.factorize(texts)
 
-    texts = df[text_column].astype(str).fillna("").tolist()
-    texts = [t[:512] for t in texts]
+    scores = get_cached_scores(unique_texts)
+    pending = [t for t in unique_texts if t not in scores]
 
     progress_bar = st.progress(0)
-    total = len(texts)
 
-    try:
-        results = classifier(texts, batch_size=32, truncation=True)
-        scores = [r["score"] if r else 0.0 for r in results]
-    except Exception:
-        scores = [0.0] * total
+    if pending:
+        try:
+            new_scores = dict(zip(pending, score_texts(pending, progress_bar).tolist()))
+            cache_scores(new_scores)
+            scores.update(new_scores)
+        except Exception:
+            pass
 
     progress_bar.progress(1.0)
     progress_bar.empty()
 
-    df["priority_score"] = scores
-    df["priority_level"] = df["priority_score"].apply(score_to_priority_label)
-    df["issue_ar"] = df[text_column]
-    df["occurrences"] = 1
-
-    grouped = (
-        df.groupby("issue_ar", as_index=False)
-        .agg({
-            "priority_score": "max",
-            "priority_level": lambda x: x.iloc[x.argmax()],
-            "occurrences": "sum"
-        })
-        .sort_values(by="priority_score", ascending=False)
-        .reset_index(drop=True)
+    grouped = pd.DataFrame({
+        "issue_ar": unique_texts,
+        "priority_score": np.array([scores.get(t, 0.0) for t in unique_texts], dtype=np.float32),
+        "occurrences": np.bincount(codes[codes >= 0], minlength=len(unique_texts))
+    }).sort_values(by="priority_score", ascending=False, ignore_index=True)
+    grouped.insert(2, "priority_level", scores_to_priority_labels(grouped["priority_score"]))
+
+    return grouped.astype({
+        "issue_ar": "string[pyarrow]",
+        "priority_level": "category",
+        "priority_score": "float32",
+        "occurrences": "int32"
+    })
+
+def read_csv_arrow(source):
+    table = pacsv.read_csv(
+        source,
+        parse_options=pacsv.ParseOptions(newlines_in_values=True),
+        convert_options=pacsv.ConvertOptions(strings_can_be_null=True)
     )
-
-    return grouped
+    return table.to_pandas(types_mapper=pd.ArrowDtype)
+
+@st.cache_data(show_spinner=False, max_entries=4)
+def load_csv(raw_bytes, name):
+    if name.endswith(".zip"):
+        with zipfile.ZipFile(io.BytesIO(raw_bytes)) as z:
+            member = next(
+                (m for m in z.infolist() if m.filename.lower().endswith(".csv") and not m.filename.startswith("__MACOSX/")),
+                None
+            )
+            if member is None:
+                raise ValueError("No CSV file found in the ZIP archive")
+            with z.open(member) as f:
+                return read_csv_arrow(f)
+    return read_csv_arrow(io.BytesIO(raw_bytes))
+
+@st.cache_data(show_spinner=False, max_entries=8)
+def to_csv_bytes(df):
+    return df.to_csv(index=False).encode("utf-8")
+
+@st.fragment
+def render_results(ranked_df, issue_lc, top_n):
+    f1, f2, f3 = st.columns([1.1,1.1,1])
+    with f1:
+        min_priority = st.slider("Minimum priority score", 0.0, 1.0, 0.0, 0.01)
+    with f2:
+        min_occ = st.number_input("Minimum occurrences", 1, int(ranked_df["occurrences"].max()), 1)
+    with f3:
+        search_term = st.text_input("Search issues (optional)")
+
+    mask = (ranked_df["priority_score"] >= min_priority) & (ranked_df["occurrences"] >= min_occ)
+
+    if search_term:
+        mask &= issue_lc.str.contains(search_term.lower(), regex=False)
+
+    filtered_df = ranked_df[mask]
+
+    total_unique = len(filtered_df)
+    top_priority = filtered_df["priority_score"].max() if total_unique > 0 else 0
+    avg_priority = filtered_df["priority_score"].mean() if total_unique > 0 else 0
+    total_occurrences = filtered_df["occurrences"].sum()
+
+    c1, c2, c3, c4 = st.columns(4)
+    metrics = [
+        ("Unique issues", total_unique),
+        ("Total records", total_occurrences),
+        ("Highest priority score", round(float(top_priority), 3)),
+        ("Average priority score", round(float(avg_priority), 3))
+    ]
+
+    for col, (label, value) in zip([c1,c2,c3,c4], metrics):
+        with col:
+            st.markdown('<div class="metric-card">', unsafe_allow_html=True)
+            st.markdown(f'<div class="metric-label">{label}</div>', unsafe_allow_html=True)
+            st.markdown(f'<div class="metric-value">{value}</div>', unsafe_allow_html=True)
+            st.markdown('</div>', unsafe_allow_html=True)
+
+    st.markdown("### Top Issues")
+
+    display_df = filtered_df[["issue_ar", "priority_level", "priority_score", "occurrences"]].head(top_n).copy()
+    display_df["priority_score"] = display_df["priority_score"].round(3)
+
+    st.dataframe(display_df, use_container_width=True)
+
+    st.markdown("### Priority Score Chart")
+    chart_df = filtered_df.head(top_n).set_index("issue_ar")[["priority_score"]]
+    st.bar_chart(chart_df)
+
+    csv_data = to_csv_bytes(filtered_df)
+    ts = datetime.now().strftime("%Y%m%d_%H%M%S")
+    st.download_button("Download CSV", csv_data, f"issues_prioritized_{ts}.csv", "text/csv")
 
 st.markdown("""
 <style>
@@ -121,13 +333,7 @@ with tab_upload:
 
         if uploaded_file:
             try:
-                if uploaded_file.name.endswith(".zip"):
-                    with zipfile.ZipFile(uploaded_file) as z:
-                        file_name = z.namelist()[0]
-                        with z.open(file_name) as f:
-                            df = pd.read_csv(f)
-                else:
-                    df = pd.read_csv(uploaded_file)
+                df = load_csv(uploaded_file.getvalue(), uploaded_file.name)
 
                 st.success(f"File loaded successfully. Rows: {len(df)}")
 
@@ -155,6 +361,7 @@ with tab_upload:
                     with st.spinner("Analyzing issues..."):
                         ranked_df = prioritize_issues(work_df, text_column=selected_column)
                         st.session_state["ranked_df"] = ranked_df
+                        st.session_state["issue_lc"] = ranked_df["issue_ar"].str.lower()
                         st.session_state["top_n"] = top_n
 
                 st.markdown('</div>', unsafe_allow_html=True)
@@ -173,57 +380,11 @@ with tab_results:
     st.markdown('<div class="panel"><div class="panel-header">Analysis & Dashboard</div>', unsafe_allow_html=True)
 
     if "ranked_df" in st.session_state:
-        ranked_df = st.session_state["ranked_df"]
-        top_n = st.session_state.get("top_n", 20)
-
-        f1, f2, f3 = st.columns([1.1,1.1,1])
-        with f1:
-            min_priority = st.slider("Minimum priority score", 0.0, 1.0, 0.0, 0.01)
-        with f2:
-            min_occ = st.number_input("Minimum occurrences", 1, int(ranked_df["occurrences"].max()), 1)
-        with f3:
-            search_term = st.text_input("Search issues (optional)")
-
-        filtered_df = ranked_df[(ranked_df["priority_score"] >= min_priority) & (ranked_df["occurrences"] >= min_occ)]
-
-        if search_term:
-            filtered_df = filtered_df[filtered_df["issue_ar"].astype(str).str.contains(search_term, case=False, na=False)]
-
-        total_unique = len(filtered_df)
-        top_priority = filtered_df["priority_score"].max() if total_unique > 0 else 0
-        avg_priority = filtered_df["priority_score"].mean() if total_unique > 0 else 0
-        total_occurrences = filtered_df["occurrences"].sum()
-
-        c1, c2, c3, c4 = st.columns(4)
-        metrics = [
-            ("Unique issues", total_unique),
-            ("Total records", total_occurrences),
-            ("Highest priority score", round(top_priority,3)),
-            ("Average priority score", round(avg_priority,3))
-        ]
-
-        for col, (label, value) in zip([c1,c2,c3,c4], metrics):
-            with col:
-                st.markdown('<div class="metric-card">', unsafe_allow_html=True)
-                st.markdown(f'<div class="metric-label">{label}</div>', unsafe_allow_html=True)
-                st.markdown(f'<div class="metric-value">{value}</div>', unsafe_allow_html=True)
-                st.markdown('</div>', unsafe_allow_html=True)
-
-        st.markdown("### Top Issues")
-
-        display_df = filtered_df[["issue_ar", "priority_level", "priority_score", "occurrences"]].head(top_n).copy()
-        display_df["priority_score"] = display_df["priority_score"].round(3)
-
-        st.dataframe(display_df, use_container_width=True)
-
-        st.markdown("### Priority Score Chart")
-        chart_df = filtered_df.head(top_n).set_index("issue_ar")[["priority_score"]]
-        st.bar_chart(chart_df)
-
-        csv_data = filtered_df.to_csv(index=False).encode("utf-8")
-        ts = datetime.now().strftime("%Y%m%d_%H%M%S")
-        st.download_button("Download CSV", csv_data, f"issues_prioritized_{ts}.csv", "text/csv")
-
+        render_results(
+            st.session_state["ranked_df"],
+            st.session_state["issue_lc"],
+            st.session_state.get("top_n", 20)
+        )
     else:
         st.info("No results yet. Run AI prioritization from 'Upload & Settings'.")
 
@@ -236,7 +397,7 @@ with tab_config:
     st.markdown("""
     ## 🤖 AI Model Overview
 
-    **Model Used:** Hugging Face `sentiment-analysis` pipeline  
+    **Model Used:** Hugging Face `distilbert-base-uncased-finetuned-sst-2-english` sentiment model  
     **Architecture:** Transformer-based deep learning model  
     **Task Type:** Text Classification  
 
@@ -252,7 +413,7 @@ with tab_config:
 
     Each issue goes through the following steps:
 
-    1. The text is truncated to 512 characters (model limit).
+    1. The text is truncated to its first 128 tokens.
     2. The AI model assigns a confidence score between **0.0 and 1.0**.
     3. The score is mapped into a priority level:
 
@@ -285,8 +446,14 @@ with tab_config:
     ## 🚀 Performance Optimization
 
     - Batch inference is used to process multiple texts at once.
+    - Texts are tokenized once and batched by length, so batches carry little padding.
     - Model is cached using `st.cache_resource` to avoid reloading.
+    - Duplicate texts are scored once, and scores are cached so re-runs skip known texts.
+    - On a CUDA GPU the model runs in half precision (fp16) and is compiled with `torch.compile`.
+    - On CPU the model is exported to ONNX Runtime (via Optimum), quantized to int8 and saved to disk.
+    - Without ONNX Runtime, linear layers are quantized to int8 to speed up CPU inference.
     - No external translation APIs are used (faster execution).
+    - Uploads are parsed with the multithreaded PyArrow CSV reader and cached across reruns.
     - Results are stored in session state for fast dashboard rendering.
 
     ---
@@ -307,8 +474,8 @@ with tab_config:
         stats = [
             ("Unique Issues", total_unique),
             ("Total Occurrences", total_occurrences),
-            ("Highest Priority Score", round(top_priority, 3)),
-            ("Average Priority Score", round(avg_priority, 3))
+            ("Highest Priority Score", round(float(top_priority), 3)),
+            ("Average Priority Score", round(float(avg_priority), 3))
         ]
 
         for col, (label, value) in zip([c1, c2, c3, c4], stats):